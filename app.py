@@ -1,12 +1,19 @@
+import math
+import os
+# The app only scores one row at a time, where OpenMP thread-team setup costs
+# more than it saves; must be set before xgboost is imported
+os.environ.setdefault("OMP_NUM_THREADS", "1")
 import streamlit as st
-import pandas as pd
 import numpy as np
-import joblib
-import pickle
-from sklearn.preprocessing import StandardScaler
-from sklearn.impute import SimpleImputer
-from xgboost import XGBClassifier
-import os
+import xgboost as xgb
+from features import COUNT_FEATURES, FLOAT_FEATURES, KERNEL_FEATURES, engineer_and_scale_batch
+from forest import load_forest, predict_forest
+try:
+    # Ahead-of-time compiled kernel built by build_preproc.py
+    from credit_preproc import preprocess as engineer_and_scale
+except ImportError:
+    from features import engineer_and_scale, warm_up
+    warm_up()
 
 # Set page config
 st.set_page_config(
@@ -17,7 +24,7 @@ st.set_page_config(
 )
 
 # Custom CSS for styling
-st.markdown("""
+_CSS_HTML = """
     <style>
         .main {
             background-color: #f5f5f5;
@@ -100,7 +107,8 @@ st.markdown("""
             color: #666;
         }
     </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(_CSS_HTML, unsafe_allow_html=True)
 
 # Load model and preprocessing artifacts
 @st.cache_resource
@@ -108,101 +116,242 @@ def load_artifacts():
     try:
         # Check if required files exist
         required_files = {
-            'model': 'credit_risk_model.pkl',
-            'scaler': 'scaler.pkl',
-            'imputer_median': 'imputer_median.pkl',
-            'imputer_mode': 'imputer_mode.pkl',
-            'feature_names': 'feature_names.pkl'
+            'model': 'credit_risk_model.ubj',
+            'preprocessing': 'preproc.npz'
         }
         
         missing_files = [name for name, path in required_files.items() if not os.path.exists(path)]
         if missing_files:
             raise FileNotFoundError(f"Missing files: {', '.join(missing_files)}")
 
-        # Load XGBoost model from pickle file
-        with open(required_files['model'], 'rb') as f:
-            model = pickle.load(f)
+        # Load XGBoost model from its native binary format, pinned to one CPU
+        # thread for interactive single-row inference
+        booster = xgb.Booster({"nthread": 1, "device": "cpu"})
+        booster.load_model(required_files['model'])
         
-        # Verify model type
-        if not isinstance(model, XGBClassifier):
-            raise TypeError("Loaded model is not an XGBClassifier")
+        # Separate copy for batch scoring that uses every core; the shared
+        # interactive booster is never reconfigured
+        batch_booster = booster.copy()
+        batch_booster.set_param({"nthread": os.cpu_count() or 1})
         
-        # Load other preprocessing artifacts
-        scaler = joblib.load(required_files['scaler'])
-        imputer_median = joblib.load(required_files['imputer_median'])
-        imputer_mode = joblib.load(required_files['imputer_mode'])
+        # Load scaling/imputation statistics and feature names in one go
+        with np.load(required_files['preprocessing'], allow_pickle=False) as z:
+            mean = np.ascontiguousarray(z['mean'], dtype=np.float64)
+            inv_scale = np.ascontiguousarray(z['inv_scale'], dtype=np.float64)
+            median = z['median']
+            mode = z['mode']
+            feature_names = z['feature_names'].tolist()
         
-        with open(required_files['feature_names'], 'rb') as f:
-            feature_names = pickle.load(f)
+        # Flatten the trees for the compiled single-row predictor (checked
+        # against XGBoost by check_forest below)
+        forest = load_forest(booster)
             
-        return model, scaler, imputer_median, imputer_mode, feature_names
+        return booster, batch_booster, forest, mean, inv_scale, median, mode, feature_names
         
     except Exception as e:
         st.error(f"Error loading model artifacts: {str(e)}")
         st.error("Please ensure all these files exist in your directory:")
-        st.error("- credit_risk_model.pkl (XGBoost model)")
-        st.error("- scaler.pkl (StandardScaler)")
-        st.error("- imputer_median.pkl (SimpleImputer for numerical features)")
-        st.error("- imputer_mode.pkl (SimpleImputer for categorical features)")
-        st.error("- feature_names.pkl (list of feature names)")
+        st.error("- credit_risk_model.ubj (XGBoost model)")
+        st.error("- preproc.npz (scaling/imputation statistics and feature names)")
+        st.error("Both are produced from the training artifacts by export_artifacts.py")
         st.stop()
 
-model, scaler, imputer_median, imputer_mode, feature_names = load_artifacts()
+(booster, batch_booster, forest, scaler_mean, scaler_inv_scale, income_median, dependents_mode,
+ feature_names) = load_artifacts()
 
-# Feature engineering function
-def engineer_features(input_df):
-    df = input_df.copy()
-    # Create new features
-    df["TotalMissedPayments"] = (
-        df["NumberOfTime30-59DaysPastDueNotWorse"] +
-        df["NumberOfTime60-89DaysPastDueNotWorse"] +
-        df["NumberOfTimes90DaysLate"]
-    )
-    df["IncomeDebtRatio"] = np.where(
-        df["DebtRatio"] == 0, 
-        0, 
-        df["MonthlyIncome"] / (df["DebtRatio"] * df["MonthlyIncome"] + 1e-6)
-    )
-    df["CreditBurden"] = df["RevolvingUtilizationOfUnsecuredLines"] / (df["NumberOfOpenCreditLinesAndLoans"] + 1)
-    
-    # Age group feature
-    df["age"] = df["age"].astype(int)
-    df["AgeGroup"] = pd.cut(
-        df["age"], 
-        bins=[0, 30, 50, 65, 100], 
-        labels=["Young", "Middle-aged", "Senior", "Elderly"]
-    )
-    return df
+# Column positions in the training feature order, resolved once at import
+COL_IDX = {name: i for i, name in enumerate(feature_names)}
+
+# Every column the kernel writes must exist in the training features; any other
+# training column is left at zero by the zero-initialised row
+missing_features = [name for name in KERNEL_FEATURES if name not in COL_IDX]
+if missing_features:
+    st.error(f"preproc.npz (from export_artifacts.py) is missing expected features: {', '.join(missing_features)}")
+    st.stop()
+KERNEL_COL_IDX = np.array([COL_IDX[name] for name in KERNEL_FEATURES], dtype=np.int64)
+
+# Cached imputation statistics
+MEDIAN_INCOME = float(income_median[0])
+MODE_DEPENDENTS = float(dependents_mode[0])
+INT16_MIN = int(np.iinfo(np.int16).min)
+INT16_MAX = int(np.iinfo(np.int16).max)
+AGE_COL = COUNT_FEATURES.index("age")
+
+# Check count inputs (shape (n, len(COUNT_FEATURES)), float64, missing values
+# already imputed) and convert them to int16; shared by preprocess_scalar and
+# batch_predict so both accept exactly the same rows
+def counts_to_int16(counts):
+    # Age is truncated like the training pipeline's astype(int)
+    counts[:, AGE_COL] = np.trunc(counts[:, AGE_COL])
+    if np.isnan(counts).any():
+        raise ValueError(
+            "Only MonthlyIncome and NumberOfDependents may contain missing values"
+        )
+    # Other counts are passed to the model as-is, so an int16 cast must not
+    # truncate them
+    if (counts != np.floor(counts)).any():
+        raise ValueError("Count inputs other than age must be whole numbers")
+    if ((counts < INT16_MIN) | (counts > INT16_MAX)).any():
+        raise ValueError(f"Count inputs must lie within [{INT16_MIN}, {INT16_MAX}]")
+    # Ages above 100 fell outside the training age-group bins
+    if (counts[:, AGE_COL] > 100).any():
+        raise ValueError("Age must not exceed 100")
+    return np.ascontiguousarray(counts.astype(np.int16))
+
+# Raw borrowers (COUNT_FEATURES, FLOAT_FEATURES) for the forest parity check:
+# both sides of every age-group boundary, incomes around the imputation median,
+# zero debt ratio and zero income, and the dataset's 96/98 late-payment codes
+PARITY_ROWS = (
+    ((18, 0, 5, 0, 1, 0, 0), (0.5, 0.5, 5000.0)),
+    ((30, 0, 5, 0, 1, 0, 0), (0.5, 0.5, 4999.0)),
+    ((31, 1, 3, 0, 0, 0, 2), (0.9, 0.0, 5400.0)),
+    ((50, 0, 8, 1, 2, 0, 1), (0.1, 0.35, 5401.0)),
+    ((51, 2, 2, 0, 0, 1, 0), (1.0, 1.2, 0.0)),
+    ((65, 0, 12, 0, 3, 0, 3), (0.02, 0.2, 10000.0)),
+    ((66, 0, 4, 0, 1, 0, 0), (0.3, 0.8, 5399.0)),
+    ((100, 98, 0, 96, 0, 98, 0), (0.0, 5.0, 1.0)),
+)
+
+# Columns blanked (set to NaN) in extra copies of each parity row so the
+# walker's missing-value branch is exercised too
+PARITY_NAN_COLUMNS = (
+    ("MonthlyIncome",),
+    ("NumberOfDependents",),
+    ("IncomeDebtRatio", "CreditBurden"),
+    tuple(feature_names),
+)
 
-# Preprocess input data
-def preprocess_input(input_df):
+# Compare the flattened forest with XGBoost on PARITY_ROWS and their NaN
+# variants; returns the largest probability difference (also warms up both)
+@st.cache_resource
+def check_forest():
+    rows = []
+    for counts, floats in PARITY_ROWS:
+        row = np.empty(len(feature_names), dtype=np.float32)
+        engineer_and_scale(
+            counts_to_int16(np.array([counts], dtype=np.float64))[0],
+            np.array(floats, dtype=np.float64),
+            KERNEL_COL_IDX, scaler_mean, scaler_inv_scale, row
+        )
+        rows.append(row)
+        for columns in PARITY_NAN_COLUMNS:
+            blanked = row.copy()
+            blanked[[COL_IDX[name] for name in columns]] = np.nan
+            rows.append(blanked)
+    rows = np.stack(rows)
+    walked = np.array([predict_forest(row, *forest) for row in rows])
+    return float(np.abs(walked - booster.inplace_predict(rows)).max())
+
+if check_forest() > 1e-5:
+    st.error("Flattened trees disagree with the XGBoost model; re-export it with export_artifacts.py")
+    st.stop()
+
+# Preprocess a single borrower straight into a scaled feature row, written into
+# out (shape (1, n_features), float32) when given
+def preprocess_scalar(age, monthly_income, debt_ratio, revol_util, num_open_credit,
+                      num_real_estate, num_dependents, late_30_59, late_60_89, late_90,
+                      out=None):
     try:
-        # Impute missing values
-        input_df["MonthlyIncome"] = imputer_median.transform(input_df[["MonthlyIncome"]])
-        input_df["NumberOfDependents"] = imputer_mode.transform(input_df[["NumberOfDependents"]])
-        
-        # Feature engineering
-        processed_df = engineer_features(input_df)
-        
-        # Convert categorical features
-        processed_df = pd.get_dummies(processed_df, columns=["AgeGroup"], drop_first=True)
-        
-        # Ensure all expected columns are present
-        for col in feature_names:
-            if col not in processed_df.columns and col != "SeriousDlqin2yrs":
-                processed_df[col] = 0
-        
-        # Reorder columns to match training data
-        processed_df = processed_df[feature_names]
-        
-        # Scale features
-        scaled_data = scaler.transform(processed_df)
-        
-        return scaled_data
+        # Impute missing values (the form widgets never produce them, but
+        # callers passing raw records may)
+        if monthly_income is None or math.isnan(monthly_income):
+            monthly_income = MEDIAN_INCOME
+        if num_dependents is None or math.isnan(num_dependents):
+            num_dependents = MODE_DEPENDENTS
+
+        # Raw inputs in COUNT_FEATURES / FLOAT_FEATURES order
+        counts = np.array([[
+            age, late_30_59, num_open_credit, late_90,
+            num_real_estate, late_60_89, num_dependents
+        ]], dtype=np.float64)
+        counts = counts_to_int16(counts)[0]
+        floats = np.array([revol_util, debt_ratio, monthly_income], dtype=np.float64)
+
+        # The kernel writes every column, so a reused buffer needs no reset
+        if out is None:
+            out = np.empty((1, len(feature_names)), dtype=np.float32)
+        engineer_and_scale(counts, floats, KERNEL_COL_IDX, scaler_mean, scaler_inv_scale, out[0])
+
+        return out
     except Exception as e:
         st.error(f"Error in preprocessing: {str(e)}")
         st.stop()
 
+# Score a DataFrame of borrowers (one row each, raw input columns by their
+# training names); returns the probability of serious delinquency per row
+def batch_predict(df):
+    # Explicit copies: to_numpy can return a read-only view of the frame's block
+    counts = df[list(COUNT_FEATURES)].to_numpy(dtype=np.float64, copy=True)
+    floats = np.ascontiguousarray(df[list(FLOAT_FEATURES)].to_numpy(dtype=np.float64, copy=True))
+
+    # Impute missing values
+    income = floats[:, FLOAT_FEATURES.index("MonthlyIncome")]
+    income[np.isnan(income)] = MEDIAN_INCOME
+    dependents = counts[:, COUNT_FEATURES.index("NumberOfDependents")]
+    dependents[np.isnan(dependents)] = MODE_DEPENDENTS
+
+    # The kernel is compiled with fastmath, so it must never see NaN
+    if np.isnan(floats).any():
+        raise ValueError(
+            "Only MonthlyIncome and NumberOfDependents may contain missing values"
+        )
+    counts = counts_to_int16(counts)
+
+    processed_data = np.empty((len(df), len(feature_names)), dtype=np.float32)
+    engineer_and_scale_batch(counts, floats, KERNEL_COL_IDX, scaler_mean, scaler_inv_scale, processed_data)
+    return batch_booster.inplace_predict(processed_data)
+
+# Memoize predictions on the raw inputs so repeated submissions skip inference;
+# _out is the caller's row buffer and is excluded from the cache key
+@st.cache_data(max_entries=1024, show_spinner=False)
+def _predict_cached(age, monthly_income, debt_ratio, revol_util, num_open_credit,
+                    num_real_estate, num_dependents, late_30_59, late_60_89, late_90,
+                    _out=None) -> float:
+    processed_data = preprocess_scalar(
+        age, monthly_income, debt_ratio, revol_util, num_open_credit,
+        num_real_estate, num_dependents, late_30_59, late_60_89, late_90, out=_out
+    )
+    return float(predict_forest(processed_data[0], *forest))
+
+# Risk tiers as (label, color, recommendation), indexed by the number of
+# thresholds (0.3, 0.7) the probability reaches
+TIERS = (
+    ("Low Risk", "#4CAF50", "✅ This applicant appears to be a low credit risk."),
+    ("Medium Risk", "#FFA500", "⚠️ This applicant has moderate credit risk. Further review recommended."),
+    ("High Risk", "#F44336", "❌ This applicant appears to be a high credit risk."),
+)
+
+# Result templates, filled with str.format
+_RESULT_HTML = """
+<h3 style='color:{color}; text-align:center;'>{risk_level}</h3>
+<p style='text-align:center; font-size:18px;'>Probability of Serious Delinquency: <b>{probability:.1%}</b></p>
+"""
+
+_METER_HTML = """
+<div class='risk-meter'>
+    <div class='risk-meter-fill' style='width:{percent}%; background:{color};'></div>
+    <div class='risk-label'>{percent:.1f}%</div>
+</div>
+<p style='text-align:center;'>{recommendation}</p>
+"""
+
+# Static "About Credit Risk" panel shown before a prediction is made
+_ABOUT_HTML = """
+<div class='info-box'>
+    <h4>About Credit Risk Analysis</h4>
+    <p>This model predicts the probability that a borrower will experience serious financial distress in the next 2 years.</p>
+
+    <div class='feature-card'>
+        <h4>Risk Categories</h4>
+        <p><b>Low Risk</b> (0-30% probability)</p>
+        <p><b>Medium Risk</b> (30-70% probability)</p>
+        <p><b>High Risk</b> (70-100% probability)</p>
+    </div>
+
+    <p><b>Note:</b> This tool provides predictive analytics to support, not replace, credit decisions.</p>
+</div>
+"""
+
 # Main app function
 def main():
     st.title("💰 Credit Risk Analysis")
@@ -231,49 +380,42 @@ def main():
                                        value=0.5, step=0.01, format="%.2f",
                                        help="Amount of credit the borrower is using relative to available credit")
             
-            num_open_credit = st.number_input("Number of Open Credit Lines/Loans", min_value=0, value=5,
+            num_open_credit = st.number_input("Number of Open Credit Lines/Loans", min_value=0, max_value=INT16_MAX, value=5,
                                             help="Total number of open credit lines and loans")
             
-            num_real_estate = st.number_input("Number of Real Estate Loans/Lines", min_value=0, value=1,
+            num_real_estate = st.number_input("Number of Real Estate Loans/Lines", min_value=0, max_value=INT16_MAX, value=1,
                                             help="Number of mortgages and real estate loans")
             
-            num_dependents = st.number_input("Number of Dependents", min_value=0, value=0,
+            num_dependents = st.number_input("Number of Dependents", min_value=0, max_value=INT16_MAX, value=0,
                                            help="Number of dependents in family (excluding self)")
             
             st.subheader("Payment History")
-            late_30_59 = st.number_input("30-59 Days Past Due (Count)", min_value=0, value=0,
+            late_30_59 = st.number_input("30-59 Days Past Due (Count)", min_value=0, max_value=INT16_MAX, value=0,
                                        help="Number of times borrower has been 30-59 days past due")
             
-            late_60_89 = st.number_input("60-89 Days Past Due (Count)", min_value=0, value=0,
+            late_60_89 = st.number_input("60-89 Days Past Due (Count)", min_value=0, max_value=INT16_MAX, value=0,
                                        help="Number of times borrower has been 60-89 days past due")
             
-            late_90 = st.number_input("90+ Days Past Due (Count)", min_value=0, value=0,
+            late_90 = st.number_input("90+ Days Past Due (Count)", min_value=0, max_value=INT16_MAX, value=0,
                                     help="Number of times borrower has been 90+ days past due")
             
             submitted = st.form_submit_button("Predict Credit Risk")
     
     with col2:
         if submitted:
-            # Create input dataframe
-            input_data = {
-                "RevolvingUtilizationOfUnsecuredLines": revol_util,
-                "age": age,
-                "NumberOfTime30-59DaysPastDueNotWorse": late_30_59,
-                "DebtRatio": debt_ratio,
-                "MonthlyIncome": monthly_income,
-                "NumberOfOpenCreditLinesAndLoans": num_open_credit,
-                "NumberOfTimes90DaysLate": late_90,
-                "NumberRealEstateLoansOrLines": num_real_estate,
-                "NumberOfTime60-89DaysPastDueNotWorse": late_60_89,
-                "NumberOfDependents": num_dependents
-            }
-            
-            input_df = pd.DataFrame([input_data])
+            # Reuse this session's feature row buffer across submissions
+            buf = st.session_state.get("_row_buf")
+            if buf is None:
+                buf = np.empty((1, len(feature_names)), dtype=np.float32)
+                st.session_state["_row_buf"] = buf
             
             # Preprocess and predict
             with st.spinner("Analyzing credit risk..."):
-                processed_data = preprocess_input(input_df)
-                probability = model.predict_proba(processed_data)[0, 1]
+                probability = _predict_cached(
+                    age, monthly_income, debt_ratio, revol_util, num_open_credit,
+                    num_real_estate, num_dependents, late_30_59, late_60_89, late_90,
+                    _out=buf
+                )
             
             # Display results
             st.subheader("Risk Assessment")
@@ -282,32 +424,17 @@ def main():
                 st.markdown("<div class='result-box'>", unsafe_allow_html=True)
                 
                 # Risk level interpretation
-                if probability < 0.3:
-                    risk_level = "Low Risk"
-                    color = "#4CAF50"
-                    recommendation = "✅ This applicant appears to be a low credit risk."
-                elif probability < 0.7:
-                    risk_level = "Medium Risk"
-                    color = "#FFA500"
-                    recommendation = "⚠️ This applicant has moderate credit risk. Further review recommended."
-                else:
-                    risk_level = "High Risk"
-                    color = "#F44336"
-                    recommendation = "❌ This applicant appears to be a high credit risk."
+                risk_level, color, recommendation = TIERS[(probability >= 0.3) + (probability >= 0.7)]
+                percent = probability * 100
                 
-                st.markdown(f"""
-                <h3 style='color:{color}; text-align:center;'>{risk_level}</h3>
-                <p style='text-align:center; font-size:18px;'>Probability of Serious Delinquency: <b>{probability:.1%}</b></p>
-                """, unsafe_allow_html=True)
+                st.markdown(_RESULT_HTML.format(
+                    color=color, risk_level=risk_level, probability=probability
+                ), unsafe_allow_html=True)
                 
                 # Risk meter
-                st.markdown(f"""
-                <div class='risk-meter'>
-                    <div class='risk-meter-fill' style='width:{probability*100}%; background:{color};'></div>
-                    <div class='risk-label'>{probability*100:.1f}%</div>
-                </div>
-                <p style='text-align:center;'>{recommendation}</p>
-                """, unsafe_allow_html=True)
+                st.markdown(_METER_HTML.format(
+                    percent=percent, color=color, recommendation=recommendation
+                ), unsafe_allow_html=True)
                 
                 st.markdown("</div>", unsafe_allow_html=True)
                 
@@ -338,21 +465,7 @@ def main():
             """, unsafe_allow_html=True)
             
             # Information about credit risk
-            st.markdown("""
-            <div class='info-box'>
-                <h4>About Credit Risk Analysis</h4>
-                <p>This model predicts the probability that a borrower will experience serious financial distress in the next 2 years.</p>
-                
-                <div class='feature-card'>
-                    <h4>Risk Categories</h4>
-                    <p><b>Low Risk</b> (0-30% probability)</p>
-                    <p><b>Medium Risk</b> (30-70% probability)</p>
-                    <p><b>High Risk</b> (70-100% probability)</p>
-                </div>
-                
-                <p><b>Note:</b> This tool provides predictive analytics to support, not replace, credit decisions.</p>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(_ABOUT_HTML, unsafe_allow_html=True)
 
     # Add footer
     st.markdown("---")
@@ -0,0 +1,18 @@
+# Ahead-of-time compile the preprocessing kernel into the credit_preproc extension.
+# Run once at build time (see Dockerfile); app.py falls back to the JIT kernel
+# in features.py when the extension is not available.
+import os
+from numba.pycc import CC
+from features import engineer_and_scale
+
+cc = CC("credit_preproc")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Same source as features.engineer_and_scale:
+# (counts i2, floats f8, col_idx i8, mean f8, inv_scale f8, out f4), all C-contiguous
+cc.export("preprocess", "void(i2[::1], f8[::1], i8[::1], f8[::1], f8[::1], f4[::1])")(
+    engineer_and_scale.py_func
+)
+
+if __name__ == "__main__":
+    cc.compile()
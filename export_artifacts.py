@@ -0,0 +1,27 @@
+# Convert the pickled training artifacts into the files app.py loads:
+#   preproc.npz            - scaling/imputation statistics and feature names
+#   credit_risk_model.ubj  - XGBoost model in native binary (UBJSON) format
+# Run once after training; needs scikit-learn and joblib, which the app itself does not.
+import pickle
+import joblib
+import numpy as np
+
+with open("credit_risk_model.pkl", "rb") as f:
+    model = pickle.load(f)
+scaler = joblib.load("scaler.pkl")
+imputer_median = joblib.load("imputer_median.pkl")
+imputer_mode = joblib.load("imputer_mode.pkl")
+with open("feature_names.pkl", "rb") as f:
+    feature_names = pickle.load(f)
+
+# Scaling statistics stay float64 so scaled values round to float32 exactly as
+# sklearn's StandardScaler output would
+np.savez_compressed(
+    "preproc.npz",
+    mean=scaler.mean_.astype(np.float64),
+    inv_scale=(1.0 / scaler.scale_).astype(np.float64),
+    median=imputer_median.statistics_.astype(np.float64),
+    mode=imputer_mode.statistics_.astype(np.float64),
+    feature_names=np.array(feature_names),
+)
+model.get_booster().save_model("credit_risk_model.ubj")
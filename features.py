@@ -0,0 +1,94 @@
+import numpy as np
+from numba import njit, prange
+
+# Raw borrower inputs that are small non-negative counts, passed as int16
+COUNT_FEATURES = (
+    "age",
+    "NumberOfTime30-59DaysPastDueNotWorse",
+    "NumberOfOpenCreditLinesAndLoans",
+    "NumberOfTimes90DaysLate",
+    "NumberRealEstateLoansOrLines",
+    "NumberOfTime60-89DaysPastDueNotWorse",
+    "NumberOfDependents",
+)
+
+# Raw borrower inputs that are continuous, passed as float64
+FLOAT_FEATURES = (
+    "RevolvingUtilizationOfUnsecuredLines",
+    "DebtRatio",
+    "MonthlyIncome",
+)
+
+# Every column written by engineer_and_scale, in the order of its col_idx argument
+KERNEL_FEATURES = COUNT_FEATURES + FLOAT_FEATURES + (
+    "TotalMissedPayments",
+    "IncomeDebtRatio",
+    "CreditBurden",
+    "AgeGroup_Middle-aged",
+    "AgeGroup_Senior",
+    "AgeGroup_Elderly",
+)
+
+# Standard-scale a single value in float64 before it is stored in the float32 row,
+# matching sklearn's float64 transform exactly at tree split thresholds
+@njit(cache=True, fastmath=True)
+def _scaled(value, j, mean, inv_scale):
+    return (value - mean[j]) * inv_scale[j]
+
+# Engineer features from the raw inputs and write them, standard-scaled, into the
+# feature row. col_idx maps each entry of KERNEL_FEATURES to its position in the row;
+# every other column gets the scaled value of zero.
+@njit(cache=True, fastmath=True)
+def engineer_and_scale(counts, floats, col_idx, mean, inv_scale, out):
+    age = counts[0]
+    late_30_59 = counts[1]
+    num_open_credit = counts[2]
+    late_90 = counts[3]
+    late_60_89 = counts[5]
+    revol_util = floats[0]
+    debt_ratio = floats[1]
+    monthly_income = floats[2]
+
+    for j in range(out.shape[0]):
+        out[j] = _scaled(0.0, j, mean, inv_scale)
+    n_counts = counts.shape[0]
+    for k in range(n_counts):
+        out[col_idx[k]] = _scaled(np.float64(counts[k]), col_idx[k], mean, inv_scale)
+    for k in range(floats.shape[0]):
+        out[col_idx[n_counts + k]] = _scaled(floats[k], col_idx[n_counts + k], mean, inv_scale)
+
+    # Engineered features
+    total_missed = np.float64(late_30_59) + late_60_89 + late_90
+    income_debt_ratio = 0.0 if debt_ratio == 0.0 else monthly_income / (debt_ratio * monthly_income + 1e-6)
+    credit_burden = revol_util / (np.float64(num_open_credit) + 1)
+    out[col_idx[10]] = _scaled(total_missed, col_idx[10], mean, inv_scale)
+    out[col_idx[11]] = _scaled(income_debt_ratio, col_idx[11], mean, inv_scale)
+    out[col_idx[12]] = _scaled(credit_burden, col_idx[12], mean, inv_scale)
+
+    # Age group dummy (bins [0, 30, 50, 65, 100] with drop_first, so "Young"
+    # leaves all dummies at zero)
+    if age > 65:
+        out[col_idx[15]] = _scaled(1.0, col_idx[15], mean, inv_scale)
+    elif age > 50:
+        out[col_idx[14]] = _scaled(1.0, col_idx[14], mean, inv_scale)
+    elif age > 30:
+        out[col_idx[13]] = _scaled(1.0, col_idx[13], mean, inv_scale)
+
+# Batch version of engineer_and_scale over (n, ...) arrays, one row per thread.
+# Compiled lazily on first use since only batch scoring needs it.
+@njit(parallel=True, cache=True)
+def engineer_and_scale_batch(counts, floats, col_idx, mean, inv_scale, out):
+    for i in prange(out.shape[0]):
+        engineer_and_scale(counts[i], floats[i], col_idx, mean, inv_scale, out[i])
+
+# Compile engineer_and_scale (or load it from the on-disk cache) ahead of the
+# first request; only needed when the AOT credit_preproc extension is missing
+def warm_up():
+    engineer_and_scale(
+        np.zeros(len(COUNT_FEATURES), dtype=np.int16),
+        np.zeros(len(FLOAT_FEATURES), dtype=np.float64),
+        np.arange(len(KERNEL_FEATURES), dtype=np.int64),
+        np.zeros(len(KERNEL_FEATURES), dtype=np.float64),
+        np.ones(len(KERNEL_FEATURES), dtype=np.float64),
+        np.zeros(len(KERNEL_FEATURES), dtype=np.float32),
+    )
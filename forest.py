@@ -0,0 +1,73 @@
+import json
+import numpy as np
+from numba import njit
+
+# Flatten a binary:logistic gbtree booster into the arrays predict_forest walks.
+# All trees share one node array; roots holds each tree's root position, leaves
+# have left == -1 and keep their leaf value in threshold.
+def load_forest(booster):
+    learner = json.loads(booster.save_raw("json"))["learner"]
+    if learner["objective"]["name"] != "binary:logistic":
+        raise ValueError(f"Unsupported objective: {learner['objective']['name']}")
+    if learner["gradient_booster"]["name"] != "gbtree":
+        raise ValueError(f"Unsupported booster: {learner['gradient_booster']['name']}")
+
+    roots, split_idx, threshold, left, right, default_left = [], [], [], [], [], []
+    offset = 0
+    for tree in learner["gradient_booster"]["model"]["trees"]:
+        if any(tree["split_type"]):
+            raise ValueError("Categorical splits are not supported")
+        tree_left = np.asarray(tree["left_children"], dtype=np.int32)
+        tree_right = np.asarray(tree["right_children"], dtype=np.int32)
+        is_leaf = tree_left == -1
+        roots.append(offset)
+        split_idx.append(np.asarray(tree["split_indices"], dtype=np.int32))
+        threshold.append(np.asarray(tree["split_conditions"], dtype=np.float32))
+        left.append(np.where(is_leaf, -1, tree_left + offset))
+        right.append(np.where(is_leaf, -1, tree_right + offset))
+        default_left.append(np.asarray(tree["default_left"], dtype=np.bool_))
+        offset += len(tree_left)
+
+    # base_score is stored as a probability, e.g. "[8.4974986E-1]"
+    base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+    base_margin = np.float32(np.log(base_score / (1.0 - base_score)))
+
+    return (
+        np.asarray(roots, dtype=np.int32),
+        np.concatenate(split_idx),
+        np.concatenate(threshold),
+        np.concatenate(left).astype(np.int32),
+        np.concatenate(right).astype(np.int32),
+        np.concatenate(default_left),
+        base_margin,
+    )
+
+# Probability of the positive class for one float32 feature row. Not fastmath:
+# the missing-value branch relies on NaN checks.
+@njit(cache=True)
+def predict_forest(row, roots, split_idx, threshold, left, right, default_left, base_margin):
+    margin = base_margin
+    for t in range(roots.shape[0]):
+        node = roots[t]
+        while left[node] != -1:
+            x = row[split_idx[node]]
+            if np.isnan(x):
+                node = left[node] if default_left[node] else right[node]
+            elif x < threshold[node]:
+                node = left[node]
+            else:
+                node = right[node]
+        margin += threshold[node]
+    return 1.0 / (1.0 + np.exp(-np.float64(margin)))
+
+# Compile (or load from the on-disk cache) at import rather than on first request
+predict_forest(
+    np.zeros(1, dtype=np.float32),
+    np.zeros(1, dtype=np.int32),
+    np.zeros(1, dtype=np.int32),
+    np.zeros(1, dtype=np.float32),
+    np.full(1, -1, dtype=np.int32),
+    np.full(1, -1, dtype=np.int32),
+    np.zeros(1, dtype=np.bool_),
+    np.float32(0.0),
+)